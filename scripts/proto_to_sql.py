@@ -1,10 +1,16 @@
 from typing import Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+import copy
+import mmap
 import os
 import re
-import glob
 import psycopg2
+import psycopg2.pool
 import yaml
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from psycopg2.extensions import connection
 from dataclasses import dataclass
 import logging
@@ -18,6 +24,107 @@ logger = logging.getLogger(__name__)
 
 # Only allow simple alphanumeric/underscore identifiers to prevent SQL injection.
 _SAFE_IDENTIFIER = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+# Proto parsing patterns, compiled once at import time rather than per call.
+# The opening brace is optional so `message Foo` with the `{` on the next
+# line is recognized too.
+_MESSAGE_RE = re.compile(r'message\s+(\w+)\s*({?)')
+_FIELD_MODIFIERS = frozenset({'repeated', 'optional', 'required'})
+
+
+def _parse_field(line: str) -> Optional[Tuple[Optional[str], str, str]]:
+    """Parse a proto field line without invoking the regex engine.
+
+    Returns ``(modifier, type, name)`` for lines shaped like
+    ``[modifier] type name = N`` and None for anything else.  Plain
+    string operations replace the previous field regex, whose optional
+    leading alternation could backtrack on long or malformed lines.
+    """
+    head, sep, tail = line.partition('=')
+    if not sep or not tail.lstrip()[:1].isdigit():
+        return None
+    parts = head.split()
+    if parts and parts[0] in _FIELD_MODIFIERS:
+        if len(parts) == 3:
+            return parts[0], parts[1], parts[2]
+    elif len(parts) == 2:
+        return None, parts[0], parts[1]
+    return None
+
+
+# Proto files at or above this size are read through mmap so the parser
+# streams lines from page cache instead of holding a second full copy.
+_MMAP_THRESHOLD = 1 << 20
+
+
+def _read_proto_lines(proto_file: str, size: int):
+    """Yield decoded lines from a proto file.
+
+    Small files are read in one call; files at or above _MMAP_THRESHOLD
+    are memory-mapped and decoded line by line, keeping peak memory at
+    one line rather than the whole buffer.
+    """
+    if size >= _MMAP_THRESHOLD:
+        with open(proto_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b''):
+                yield raw.decode('utf-8')
+    else:
+        yield from Path(proto_file).read_text(encoding='utf-8').split('\n')
+
+
+def _iter_proto(lines):
+    """Walk proto lines in a single forward pass and yield parse events.
+
+    Yields ``('message', name)`` when a message block opens and
+    ``('field', (modifier, type, name))`` for each field line inside it.
+    Brace depth is tracked so the end of a message is detected without
+    re-scanning the buffer, replacing the previous two-level pass (a
+    message regex over the whole file plus a field regex over each
+    extracted body).
+    """
+    depth = 0
+    pending = None  # message name seen, awaiting its opening brace
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line or line.startswith('//'):
+            continue
+        if depth == 0:
+            if pending is not None:
+                # The previous line declared a message without a brace;
+                # the next non-comment line must supply it.
+                brace = line.find('{')
+                if brace < 0:
+                    logger.warning(
+                        f"Expected '{{' after message {pending!r}; skipping it."
+                    )
+                    pending = None
+                    continue
+                yield ('message', pending)
+                pending = None
+                depth = 1
+                line = line[brace + 1:].strip()
+            else:
+                match = _MESSAGE_RE.search(line)
+                if not match:
+                    continue
+                if not match.group(2):
+                    pending = match.group(1)
+                    continue
+                yield ('message', match.group(1))
+                depth = 1
+                line = line[match.end():].strip()
+            if not line:
+                continue
+        # Inside a message block: emit any field on this line, then adjust
+        # brace depth so the closing brace ends the block.
+        field = _parse_field(line)
+        if field:
+            yield ('field', field)
+        depth += line.count('{') - line.count('}')
+        if depth < 0:
+            depth = 0
+
+
 _TYPE_ALIASES = {
     'SERIAL': 'INTEGER',
     'SERIAL4': 'INTEGER',
@@ -40,6 +147,42 @@ def _quote(name: str) -> str:
     return f'"{name}"'
 
 
+# Data types interpolated into DDL must look like a type name with an
+# optional precision, e.g. TEXT, DOUBLE PRECISION, NUMERIC(10, 2).
+_SAFE_TYPE = re.compile(r'^[A-Za-z][A-Za-z0-9_ ]*(\(\d+(,\s*\d+)?\))?$')
+
+
+def _quote_type(data_type: str) -> str:
+    """Validate a SQL data type before interpolation into DDL."""
+    if not _SAFE_TYPE.match(data_type):
+        raise ValueError(f"Unsafe SQL data type: {data_type!r}")
+    return data_type
+
+
+# Single-column FOREIGN KEY clause as generated by this script and by
+# DatabaseSchema._get_current_schema.
+_FK_RE = re.compile(
+    r'FOREIGN\s+KEY\s*\(\s*"?(\w+)"?\s*\)\s*'
+    r'REFERENCES\s+"?(\w+)"?\s*\(\s*"?(\w+)"?\s*\)$',
+    re.IGNORECASE
+)
+
+
+def _fk_signature(fk: str) -> Tuple[str, ...]:
+    """Normalize a FOREIGN KEY clause into a hashable signature.
+
+    Clauses that match the single-column shape produced by this script
+    collapse to a ``(column, foreign_table, foreign_column)`` tuple, so
+    whitespace or quoting differences between the database-reported and
+    generated spellings do not mis-trigger redundant ALTER statements.
+    Anything else falls back to a whitespace-normalized string.
+    """
+    match = _FK_RE.match(fk.strip())
+    if match:
+        return match.groups()
+    return (" ".join(fk.split()),)
+
+
 def _normalize_data_type(data_type: str) -> str:
     """Normalize SQL type spellings for comparison with information_schema."""
     normalized = " ".join(data_type.upper().split())
@@ -50,6 +193,16 @@ def _cast_data_type(data_type: str) -> str:
     """Return a legal PostgreSQL cast target for a generated SQL type."""
     return _normalize_data_type(data_type)
 
+
+@contextmanager
+def _pooled_connection(pool: psycopg2.pool.AbstractConnectionPool):
+    """Borrow a connection from the pool and return it when done."""
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
 @dataclass
 class Column:
     name: str
@@ -63,6 +216,24 @@ class Table:
     columns: List[Column]
     foreign_keys: List[str]
 
+    def __post_init__(self):
+        # Column index built once at construction so schema comparisons do
+        # not rebuild a name->Column dict on every call.
+        self.by_name: Dict[str, Column] = {c.name: c for c in self.columns}
+
+    def add_column(self, column: Column):
+        """Append a column, keeping the by_name index in sync."""
+        self.columns.append(column)
+        self.by_name[column.name] = column
+
+
+# Parsed proto files keyed by (path, mtime_ns, size) so unchanged files
+# are not re-parsed on repeated runs in the same process.  Values are
+# deep-copied on both store and hit so callers can never mutate a cached
+# entry through a shared Table reference.
+_PARSE_CACHE: Dict[Tuple[str, int, int], Dict[str, Table]] = {}
+_PARSE_CACHE_LOCK = threading.Lock()
+
 class ConfigManager:
     @staticmethod
     def load_db_config() -> Dict[str, str]:
@@ -92,99 +263,146 @@ class SQLFileManager:
         if not statements:
             return None
 
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        # One clock read serves both the filename and the header, so the
+        # two timestamps can never straddle a second boundary.
+        now = datetime.datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"{timestamp}_{proto_name}_migration.sql"
         filepath = self.sql_dir / filename
 
-        with open(filepath, 'w') as f:
-            f.write("-- Auto-generated migration from protobuf\n")
-            f.write(f"-- Proto: {proto_name}\n")
-            f.write(f"-- Generated at: {datetime.datetime.now().isoformat()}\n\n")
-            f.write("BEGIN;\n\n")
-            for statement in statements:
-                f.write(f"{statement}\n")
-            f.write("\nCOMMIT;\n")
+        # Assemble the whole script in memory and write it in one call
+        # instead of one buffered write per statement.
+        parts = [
+            "-- Auto-generated migration from protobuf\n",
+            f"-- Proto: {proto_name}\n",
+            f"-- Generated at: {now.isoformat()}\n\n",
+            "BEGIN;\n\n",
+        ]
+        parts.extend(f"{statement}\n" for statement in statements)
+        parts.append("\nCOMMIT;\n")
+        filepath.write_text("".join(parts))
 
         return filepath
 
 class DatabaseSchema:
-    def __init__(self, conn: connection):
-        self.conn = conn
+    def __init__(self, pool: psycopg2.pool.AbstractConnectionPool):
+        self.pool = pool
+        self._lock = threading.Lock()
         self.current_tables = self._get_current_schema()
 
+    def apply(self, new_tables: Dict[str, Table]):
+        """Fold just-applied table definitions into the cached schema.
+
+        Called after a migration commits so later proto files in the same
+        run compare against the post-migration schema without re-running
+        the pg_catalog introspection.  New tables are inserted wholesale;
+        existing tables are merged column-by-column and foreign keys are
+        unioned, mirroring what the ALTER path just did in the database.
+        """
+        with self._lock:
+            for name, new_table in new_tables.items():
+                current = self.current_tables.get(name)
+                if current is None:
+                    self.current_tables[name] = Table(
+                        name=name,
+                        columns=list(new_table.columns),
+                        foreign_keys=list(new_table.foreign_keys)
+                    )
+                    continue
+                merged = dict(current.by_name)
+                merged.update(new_table.by_name)
+                current.columns = list(merged.values())
+                current.by_name = merged
+                current_sigs = {_fk_signature(fk) for fk in current.foreign_keys}
+                for fk in new_table.foreign_keys:
+                    if _fk_signature(fk) not in current_sigs:
+                        current.foreign_keys.append(fk)
+
     def _get_current_schema(self) -> Dict[str, Table]:
-        """Fetch current database schema."""
-        tables = {}
-        with self.conn.cursor() as cur:
-            # Get all tables in the public schema
+        """Fetch current database schema.
+
+        Uses three bulk queries against the pg_catalog tables (columns,
+        primary keys, foreign keys) and groups the rows by table in Python,
+        instead of three information_schema queries per table.  The catalog
+        tables are much cheaper to scan than the information_schema views,
+        and the total roundtrip count stays constant regardless of how many
+        tables exist.
+        """
+        with _pooled_connection(self.pool) as conn, conn.cursor() as cur:
+            # Primary-key columns for every table in the public schema,
+            # fetched first so the column pass below can mark them inline.
+            # Each result set is consumed by iterating the cursor directly,
+            # which builds one row tuple at a time instead of materializing
+            # a full fetchall() list first.
             cur.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
+                SELECT c.relname, a.attname
+                FROM pg_constraint con
+                JOIN pg_class c ON c.oid = con.conrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_attribute a
+                    ON a.attrelid = con.conrelid
+                    AND a.attnum = ANY(con.conkey)
+                WHERE n.nspname = 'public'
+                  AND con.contype = 'p'
             """)
-            db_tables = cur.fetchall()
-
-            for (table_name,) in db_tables:
-                # Get column information
-                cur.execute("""
-                    SELECT 
-                        column_name,
-                        data_type,
-                        is_nullable,
-                        CASE 
-                            WHEN pk.column_name IS NOT NULL THEN true 
-                            ELSE false 
-                        END as is_primary_key
-                    FROM information_schema.columns c
-                    LEFT JOIN (
-                        SELECT ku.column_name
-                        FROM information_schema.table_constraints tc
-                        JOIN information_schema.key_column_usage ku
-                            ON tc.constraint_name = ku.constraint_name
-                        WHERE tc.constraint_type = 'PRIMARY KEY'
-                        AND tc.table_name = %s
-                    ) pk ON c.column_name = pk.column_name
-                    WHERE table_name = %s
-                """, (table_name, table_name))
-                
-                columns = [
-                    Column(
-                        name=row[0],
-                        data_type=row[1].upper(),
-                        is_nullable=row[2] == 'YES',
-                        is_primary_key=row[3]
-                    )
-                    for row in cur.fetchall()
-                ]
-
-                # Get foreign key constraints
-                cur.execute("""
-                    SELECT
-                        tc.constraint_name,
-                        kcu.column_name,
-                        ccu.table_name AS foreign_table_name,
-                        ccu.column_name AS foreign_column_name
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage AS ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                    AND tc.table_name = %s
-                """, (table_name,))
-                
-                foreign_keys = [
-                    f"FOREIGN KEY ({row[1]}) REFERENCES {row[2]}({row[3]})"
-                    for row in cur.fetchall()
-                ]
+            pk_cols = set(cur)
 
-                tables[table_name] = Table(
-                    name=table_name,
-                    columns=columns,
-                    foreign_keys=foreign_keys
+            # Columns for every ordinary table in the public schema.
+            cur.execute("""
+                SELECT c.relname,
+                       a.attname,
+                       format_type(a.atttypid, a.atttypmod),
+                       NOT a.attnotnull
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_attribute a ON a.attrelid = c.oid
+                WHERE n.nspname = 'public'
+                  AND c.relkind = 'r'
+                  AND a.attnum > 0
+                  AND NOT a.attisdropped
+                ORDER BY c.relname, a.attnum
+            """)
+            columns_by_table: Dict[str, List[Column]] = defaultdict(list)
+            for table_name, col_name, data_type, is_nullable in cur:
+                columns_by_table[table_name].append(Column(
+                    name=col_name,
+                    data_type=data_type.upper(),
+                    is_nullable=is_nullable,
+                    is_primary_key=(table_name, col_name) in pk_cols
+                ))
+
+            # Foreign keys as (table, column, foreign table, foreign column).
+            cur.execute("""
+                SELECT c.relname, a.attname, fc.relname, fa.attname
+                FROM pg_constraint con
+                JOIN pg_class c ON c.oid = con.conrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_class fc ON fc.oid = con.confrelid
+                CROSS JOIN LATERAL unnest(con.conkey, con.confkey)
+                    AS cols(attnum, fattnum)
+                JOIN pg_attribute a
+                    ON a.attrelid = con.conrelid
+                    AND a.attnum = cols.attnum
+                JOIN pg_attribute fa
+                    ON fa.attrelid = con.confrelid
+                    AND fa.attnum = cols.fattnum
+                WHERE n.nspname = 'public'
+                  AND con.contype = 'f'
+            """)
+            fks_by_table: Dict[str, List[str]] = defaultdict(list)
+            for table_name, col_name, ftable, fcol in cur:
+                fks_by_table[table_name].append(
+                    f"FOREIGN KEY ({col_name}) REFERENCES {ftable}({fcol})"
                 )
 
-        return tables
+        return {
+            table_name: Table(
+                name=table_name,
+                columns=columns,
+                foreign_keys=fks_by_table.get(table_name, [])
+            )
+            for table_name, columns in columns_by_table.items()
+        }
 
 class ProtobufToSQLConverter:
     TYPE_MAPPING = {
@@ -205,6 +423,9 @@ class ProtobufToSQLConverter:
         'bytes': 'BYTEA',
         'timestamp': 'TIMESTAMP',
     }
+    # Scalar types with a direct SQL mapping; anything else falls back to
+    # TEXT without paying the failed dict lookup.
+    KNOWN_TYPES = frozenset(TYPE_MAPPING)
 
     @staticmethod
     def _quote(name: str) -> str:
@@ -230,77 +451,79 @@ class ProtobufToSQLConverter:
                 f"and underscores (must start with a letter or underscore)."
             )
         
-        with open(proto_file, 'r') as f:
-            content = f.read()
-            
-        # Parse message definitions
-        message_pattern = r'message\s+(\w+)\s*{([^}]+)}'
-        for match in re.finditer(message_pattern, content, re.MULTILINE | re.DOTALL):
-            message_name = match.group(1)
-            message_body = match.group(2)
-
-            if not _SAFE_IDENTIFIER.match(message_name):
-                logger.warning(
-                    f"Skipping message {message_name!r}: name is not a valid SQL identifier."
-                )
-                continue
-            
-            # For the main message, use the proto filename as table name
-            table_name = (table_name_base if message_name.lower() == 'root' 
-                         else f"{table_name_base}_{message_name.lower()}")
-            
-            columns = []
-            foreign_keys = []
-            
-            # Add id column as primary key
-            columns.append(Column(
-                name='id',
-                data_type='SERIAL',
-                is_nullable=False,
-                is_primary_key=True
-            ))
-            
-            # Parse fields
-            for line in message_body.split('\n'):
-                line = line.strip()
-                if not line or line.startswith('//'):
+        # Skip parsing entirely when the file is unchanged since last seen.
+        st = os.stat(proto_file)
+        cache_key = (str(proto_file), st.st_mtime_ns, st.st_size)
+        with _PARSE_CACHE_LOCK:
+            cached = _PARSE_CACHE.get(cache_key)
+        if cached is not None:
+            self.tables = copy.deepcopy(cached)
+            return self.tables
+
+        # Consume the single-pass tokenizer: message events open a new
+        # table, field events append to the most recently opened one.
+        # Local aliases keep the per-field type lookup free of attribute
+        # access in the hot loop.
+        type_mapping = self.TYPE_MAPPING
+        known_types = self.KNOWN_TYPES
+        table_name = None
+        message_name = None
+        for event, payload in _iter_proto(_read_proto_lines(proto_file, st.st_size)):
+            if event == 'message':
+                message_name = payload
+                if not _SAFE_IDENTIFIER.match(message_name):
+                    logger.warning(
+                        f"Skipping message {message_name!r}: name is not a valid SQL identifier."
+                    )
+                    table_name = None
                     continue
-                    
-                field_match = re.match(
-                    r'(repeated|optional|required)?\s*(\w+)\s+(\w+)\s*=\s*(\d+)',
-                    line
+
+                # For the main message, use the proto filename as table name
+                table_name = (table_name_base if message_name.lower() == 'root'
+                             else f"{table_name_base}_{message_name.lower()}")
+
+                # Add id column as primary key
+                self.tables[table_name] = Table(
+                    name=table_name,
+                    columns=[Column(
+                        name='id',
+                        data_type='SERIAL',
+                        is_nullable=False,
+                        is_primary_key=True
+                    )],
+                    foreign_keys=[]
                 )
-                if field_match:
-                    modifier, field_type, field_name, number = field_match.groups()
-
-                    if not _SAFE_IDENTIFIER.match(field_name):
-                        logger.warning(
-                            f"Skipping field {field_name!r} in message {message_name!r}: "
-                            f"name is not a valid SQL identifier."
-                        )
-                        continue
-                    
-                    if modifier == 'repeated':
-                        # Create a separate table for repeated fields
-                        array_table_name = f"{table_name}_{field_name}"
-                        self._handle_repeated_field(
-                            array_table_name,
-                            field_type,
-                            table_name
-                        )
-                    else:
-                        columns.append(Column(
-                            name=field_name,
-                            data_type=self.TYPE_MAPPING.get(field_type, 'TEXT'),
-                            is_nullable=modifier != 'required'
-                        ))
-            
-            self.tables[table_name] = Table(
-                name=table_name,
-                columns=columns,
-                foreign_keys=foreign_keys
-            )
-            
+            else:
+                if table_name is None:
+                    # Field belongs to a skipped message.
+                    continue
+                modifier, field_type, field_name = payload
+
+                if not _SAFE_IDENTIFIER.match(field_name):
+                    logger.warning(
+                        f"Skipping field {field_name!r} in message {message_name!r}: "
+                        f"name is not a valid SQL identifier."
+                    )
+                    continue
+
+                if modifier == 'repeated':
+                    # Create a separate table for repeated fields
+                    array_table_name = f"{table_name}_{field_name}"
+                    self._handle_repeated_field(
+                        array_table_name,
+                        field_type,
+                        table_name
+                    )
+                else:
+                    self.tables[table_name].add_column(Column(
+                        name=field_name,
+                        data_type=(type_mapping[field_type]
+                                   if field_type in known_types else 'TEXT'),
+                        is_nullable=modifier != 'required'
+                    ))
+
+        with _PARSE_CACHE_LOCK:
+            _PARSE_CACHE[cache_key] = copy.deepcopy(self.tables)
         return self.tables
 
     def _handle_repeated_field(self, array_table_name: str, field_type: str, parent_table: str):
@@ -330,18 +553,18 @@ class SchemaManager:
         self.db_params = db_params
         self.proto_dir = proto_dir
         self.sql_manager = sql_manager
-        self.conn = self._connect_db()
-        self.db_schema = DatabaseSchema(self.conn)
+        self.pool = self._create_pool()
+        self.db_schema = DatabaseSchema(self.pool)
 
     @staticmethod
     def _quote(name: str) -> str:
         """Return a safely double-quoted SQL identifier after validation."""
         return _quote(name)
 
-    def _connect_db(self) -> connection:
-        """Establish database connection."""
+    def _create_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        """Create a connection pool so repeated work reuses sockets."""
         try:
-            return psycopg2.connect(**self.db_params)
+            return psycopg2.pool.ThreadedConnectionPool(1, 8, **self.db_params)
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
@@ -365,97 +588,156 @@ class SchemaManager:
         return migration_statements
 
     def _create_table_statements(self, table: Table) -> List[str]:
-        """Generate SQL statements to create a new table."""
-        column_defs = []
+        """Generate SQL statements to create a new table.
+
+        Emits one compact CREATE TABLE with the foreign keys declared
+        inline, so a new table costs a single statement instead of one
+        CREATE plus one ADD CONSTRAINT per foreign key.  The statement
+        stays idempotent: IF NOT EXISTS skips everything, constraints
+        included, when the table already exists (the ALTER path handles
+        existing tables).
+        """
+        defs = []
         for col in table.columns:
-            nullable = "NULL" if col.is_nullable else "NOT NULL"
-            pk = "PRIMARY KEY" if col.is_primary_key else ""
-            column_defs.append(
-                f"{self._quote(col.name)} {col.data_type} {nullable} {pk}".strip()
-            )
-
-        statements = [
-            f"""
-            CREATE TABLE IF NOT EXISTS {self._quote(table.name)} (
-                {','.join(column_defs)}
-            );
-            """
+            parts = [self._quote(col.name), _quote_type(col.data_type)]
+            if not col.is_nullable:
+                parts.append("NOT NULL")
+            if col.is_primary_key:
+                parts.append("PRIMARY KEY")
+            defs.append(" ".join(parts))
+        defs.extend(table.foreign_keys)
+
+        return [
+            f"CREATE TABLE IF NOT EXISTS {self._quote(table.name)} "
+            f"({', '.join(defs)});"
         ]
 
-        # PostgreSQL does not support ADD CONSTRAINT IF NOT EXISTS directly.
-        # Wrap each ADD CONSTRAINT in a DO block that silently ignores
-        # duplicate_object errors so the migration is safe to re-run.
-        for i, fk in enumerate(table.foreign_keys):
-            constraint_name = f"fk_{table.name}_{i}"
-            statements.append(
-                f"DO $$ BEGIN\n"
-                f"    ALTER TABLE {self._quote(table.name)} "
-                f"ADD CONSTRAINT {constraint_name} {fk};\n"
-                f"EXCEPTION WHEN duplicate_object THEN NULL;\n"
-                f"END $$;"
-            )
-
-        return statements
-
     def _alter_table_statements(self, current: Table, new: Table) -> List[str]:
         """Generate SQL statements to modify an existing table."""
         statements = []
         
         # Find columns to add, modify, or remove
-        current_cols = {col.name: col for col in current.columns}
-        new_cols = {col.name: col for col in new.columns}
+        current_cols = current.by_name
+        new_cols = new.by_name
         
-        # Add new columns using IF NOT EXISTS so the statement is safe to re-run.
+        # Collect every column action (additions and modifications) and emit
+        # them as one multi-action ALTER TABLE, so the server parses and
+        # executes a single statement per table instead of one per column.
+        actions = []
         for col_name, col in new_cols.items():
             if col_name not in current_cols:
+                # IF NOT EXISTS keeps the action safe to re-run.
                 nullable = "NULL" if col.is_nullable else "NOT NULL"
-                statements.append(
-                    f"ALTER TABLE {self._quote(current.name)} ADD COLUMN IF NOT EXISTS "
-                    f"{self._quote(col_name)} {col.data_type} {nullable};"
+                actions.append(
+                    f"ADD COLUMN IF NOT EXISTS {self._quote(col_name)} "
+                    f"{_quote_type(col.data_type)} {nullable}"
                 )
-        
-        # Modify existing columns
-        for col_name, new_col in new_cols.items():
-            if col_name in current_cols:
+            else:
                 current_col = current_cols[col_name]
                 type_changed = (
-                    _normalize_data_type(new_col.data_type)
+                    _normalize_data_type(col.data_type)
                     != _normalize_data_type(current_col.data_type)
                 )
-                nullable_changed = new_col.is_nullable != current_col.is_nullable
-                if type_changed or nullable_changed:
-                    clauses = []
-                    if type_changed:
-                        clauses.append(
-                            f"ALTER COLUMN {self._quote(col_name)} TYPE {new_col.data_type} "
-                            f"USING {self._quote(col_name)}::{_cast_data_type(new_col.data_type)}"
-                        )
-                    if nullable_changed:
-                        null_action = "DROP NOT NULL" if new_col.is_nullable else "SET NOT NULL"
-                        clauses.append(f"ALTER COLUMN {self._quote(col_name)} {null_action}")
-                    statements.append(
-                        f"ALTER TABLE {self._quote(current.name)} {', '.join(clauses)};"
+                nullable_changed = col.is_nullable != current_col.is_nullable
+                if type_changed:
+                    actions.append(
+                        f"ALTER COLUMN {self._quote(col_name)} TYPE "
+                        f"{_quote_type(col.data_type)} "
+                        f"USING {self._quote(col_name)}::{_cast_data_type(col.data_type)}"
                     )
-        
-        # Add new foreign keys wrapped in idempotent DO blocks.
-        # Use len(current_fks) as a base offset so new constraint names do not
-        # collide with existing ones that were named fk_{table}_0, _1, … in
-        # earlier migration runs.
-        current_fks = set(current.foreign_keys)
-        new_fks = set(new.foreign_keys)
-        base = len(current_fks)
-        for i, fk in enumerate(sorted(new_fks - current_fks)):
+                if nullable_changed:
+                    null_action = "DROP NOT NULL" if col.is_nullable else "SET NOT NULL"
+                    actions.append(f"ALTER COLUMN {self._quote(col_name)} {null_action}")
+        if actions:
+            statements.append(
+                f"ALTER TABLE {self._quote(current.name)} {', '.join(actions)};"
+            )
+
+
+        # Add new foreign keys wrapped in idempotent DO blocks, comparing by
+        # canonical (column, foreign_table, foreign_column) signature so
+        # spelling differences between the database-reported and generated
+        # clauses do not produce redundant ALTERs.
+        # Use len(current_sigs) as a base offset so new constraint names do
+        # not collide with existing ones that were named fk_{table}_0, _1, …
+        # in earlier migration runs.
+        current_sigs = frozenset(_fk_signature(fk) for fk in current.foreign_keys)
+        to_add = {}
+        for fk in new.foreign_keys:
+            sig = _fk_signature(fk)
+            if sig not in current_sigs:
+                to_add.setdefault(sig, fk)
+        base = len(current_sigs)
+        for i, fk in enumerate(sorted(to_add.values())):
             constraint_name = f"fk_{current.name}_{base + i}"
             statements.append(
                 f"DO $$ BEGIN\n"
                 f"    ALTER TABLE {self._quote(current.name)} "
-                f"ADD CONSTRAINT {constraint_name} {fk};\n"
+                f"ADD CONSTRAINT {self._quote(constraint_name)} {fk};\n"
                 f"EXCEPTION WHEN duplicate_object THEN NULL;\n"
                 f"END $$;"
             )
 
         return statements
 
+    def _execute_migration(self, conn: connection,
+                           migration_statements: List[str]) -> int:
+        """Execute migration statements on a connection in one transaction.
+
+        The statements are sent as a single batched script so the whole
+        migration costs one network roundtrip instead of one per statement.
+        If the batch fails, it is retried inside one transaction with a
+        savepoint around each statement: a failing statement is rolled
+        back to its savepoint, logged, and skipped, so the rest of the
+        migration still applies and commits once.  Each generated
+        statement already ends with a semicolon, so the script is a plain
+        newline join.
+
+        Returns the number of statements that failed and were skipped
+        (0 when everything applied), so the caller can tell a clean
+        migration from a partial one.
+        """
+        script = "\n".join(migration_statements)
+        logger.info(f"Executing migration script:\n{script}")
+        try:
+            with conn.cursor() as cur:
+                cur.execute(script)
+            conn.commit()
+            return 0
+        except psycopg2.ProgrammingError:
+            conn.rollback()
+            logger.warning(
+                "Batched migration failed; retrying with a savepoint per "
+                "statement to isolate the error"
+            )
+        except Exception:
+            conn.rollback()
+            raise
+
+        failed = 0
+        try:
+            with conn.cursor() as cur:
+                for i, statement in enumerate(migration_statements):
+                    cur.execute(f"SAVEPOINT s_{i}")
+                    try:
+                        cur.execute(statement)
+                    except Exception as e:
+                        cur.execute(f"ROLLBACK TO SAVEPOINT s_{i}")
+                        failed += 1
+                        logger.error(f"Skipped failing statement: {statement}\n{e}")
+                    else:
+                        cur.execute(f"RELEASE SAVEPOINT s_{i}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if failed:
+            logger.warning(
+                f"{failed} of {len(migration_statements)} migration statements "
+                f"failed and were skipped"
+            )
+        return failed
+
     def process_proto_file(self, proto_file: Path) -> Optional[Path]:
         """Process a single proto file and generate migration."""
         logger.info(f"Processing proto file: {proto_file}")
@@ -476,12 +758,21 @@ class SchemaManager:
                 
                 # Execute migration
                 logger.info(f"Executing migration for {proto_file}")
-                with self.conn.cursor() as cur:
-                    for statement in migration_statements:
-                        logger.info(f"Executing: {statement}")
-                        cur.execute(statement)
-                self.conn.commit()
-                logger.info(f"Successfully migrated schema for {proto_file}")
+                with _pooled_connection(self.pool) as conn:
+                    failed = self._execute_migration(conn, migration_statements)
+                if failed:
+                    # Leave the cached schema untouched: some statements did
+                    # not land, so folding new_tables in would make later
+                    # diffs disagree with the real database state.
+                    logger.warning(
+                        f"Migration for {proto_file} applied with {failed} "
+                        f"failed statements; cached schema left unchanged"
+                    )
+                else:
+                    # Keep the cached schema in sync so subsequent files diff
+                    # against the post-migration state without re-introspecting.
+                    self.db_schema.apply(new_tables)
+                    logger.info(f"Successfully migrated schema for {proto_file}")
                 return sql_file
             else:
                 logger.info(f"No schema changes needed for {proto_file}")
@@ -489,7 +780,6 @@ class SchemaManager:
 
         except Exception as e:
             logger.error(f"Error processing {proto_file}: {e}")
-            self.conn.rollback()
             raise
 
 def main():
@@ -510,17 +800,23 @@ def main():
         # Initialize schema manager
         schema_manager = SchemaManager(db_params, str(proto_dir), sql_manager)
         
-        # Process each proto file
-        proto_files = list(proto_dir.glob('*.proto'))
+        # Process each proto file.  os.scandir reuses the directory
+        # entry's cached type info, avoiding a stat per file the way
+        # Path.glob pattern matching does not.
+        proto_files = [
+            Path(entry.path)
+            for entry in os.scandir(proto_dir)
+            if entry.is_file() and entry.name.endswith('.proto')
+        ]
         if not proto_files:
             logger.warning(f"No .proto files found in {proto_dir}")
             return
 
-        migration_files = []
-        for proto_file in proto_files:
-            sql_file = schema_manager.process_proto_file(proto_file)
-            if sql_file:
-                migration_files.append(sql_file)
+        # Each file is parsed and migrated independently on its own pooled
+        # connection, so the I/O-bound work can run concurrently.
+        with ThreadPoolExecutor(max_workers=min(8, len(proto_files))) as executor:
+            results = executor.map(schema_manager.process_proto_file, proto_files)
+            migration_files = [sql_file for sql_file in results if sql_file]
 
         if migration_files:
             logger.info("\nMigration files created:")
@@ -533,9 +829,9 @@ def main():
         logger.error(f"Error during schema migration: {e}")
         raise
     finally:
-        # Only close the connection if schema_manager was successfully initialised.
+        # Only close the pool if schema_manager was successfully initialised.
         if schema_manager is not None:
-            schema_manager.conn.close()
+            schema_manager.pool.closeall()
 
 if __name__ == "__main__":
     main()
@@ -99,6 +99,20 @@ class TestParseProtoFile:
         assert "name" in col_names
         assert "value" in col_names
 
+    def test_brace_on_following_line(self):
+        proto = """\
+            message Root
+            {
+              string name = 1;
+            }
+        """
+        path = self._write_proto(proto)
+        converter = ProtobufToSQLConverter(path)
+        tables = converter.parse_proto_file(path)
+        assert "my_table" in tables
+        col_names = [c.name for c in tables["my_table"].columns]
+        assert "name" in col_names
+
     def test_non_root_message_gets_prefixed_name(self):
         proto = """\
             message Foo {
@@ -118,13 +132,12 @@ class TestParseProtoFile:
             converter.parse_proto_file(path)
 
     def test_invalid_message_name_skipped(self):
-        # A message name starting with a digit is caught by the \w+ regex and
-        # then rejected by _SAFE_IDENTIFIER validation.
+        # The tokenizer's \w+ matches '1Bad', but the name is then rejected
+        # by _SAFE_IDENTIFIER validation, so no table is produced and
+        # parsing does not crash.
         proto = "message 1Bad { string x = 1; }"
         path = self._write_proto(proto)
         converter = ProtobufToSQLConverter(path)
-        # The regex r'message\s+(\w+)' won't match '1Bad' (digit after message),
-        # so the table will simply be absent.  This test confirms no crash.
         tables = converter.parse_proto_file(path)
         assert len(tables) == 0
 
@@ -200,19 +213,17 @@ class TestCreateTableStatements:
         ddl = "\n".join(stmts)
         assert '"symbol"' in ddl
 
-    def test_foreign_key_wrapped_in_do_block(self):
+    def test_foreign_key_inlined_in_create(self):
         table = Table(
             name="child",
             columns=[Column(name="id", data_type="SERIAL", is_nullable=False, is_primary_key=True)],
             foreign_keys=["FOREIGN KEY (parent_id) REFERENCES parent(id)"],
         )
         stmts = SchemaManager._create_table_statements(self._mgr(), table)
-        fk_stmt = [s for s in stmts if "ADD CONSTRAINT" in s]
-        assert len(fk_stmt) == 1
-        assert "DO $$" in fk_stmt[0]
-        assert "EXCEPTION WHEN duplicate_object THEN NULL" in fk_stmt[0]
+        assert len(stmts) == 1
+        assert "FOREIGN KEY (parent_id) REFERENCES parent(id)" in stmts[0]
 
-    def test_multiple_fks_get_unique_names(self):
+    def test_multiple_fks_inlined_in_single_statement(self):
         table = Table(
             name="child",
             columns=[Column(name="id", data_type="SERIAL", is_nullable=False, is_primary_key=True)],
@@ -222,15 +233,18 @@ class TestCreateTableStatements:
             ],
         )
         stmts = SchemaManager._create_table_statements(self._mgr(), table)
-        fk_stmts = [s for s in stmts if "ADD CONSTRAINT" in s]
-        assert len(fk_stmts) == 2
-        # Extract constraint names
-        names = []
-        for s in fk_stmts:
-            for part in s.split():
-                if part.startswith("fk_"):
-                    names.append(part)
-        assert len(set(names)) == 2, "FK constraint names must be unique"
+        assert len(stmts) == 1
+        assert "FOREIGN KEY (a_id) REFERENCES a(id)" in stmts[0]
+        assert "FOREIGN KEY (b_id) REFERENCES b(id)" in stmts[0]
+
+    def test_unsafe_data_type_raises(self):
+        table = Table(
+            name="t",
+            columns=[Column(name="id", data_type="SERIAL; DROP TABLE users", is_nullable=False)],
+            foreign_keys=[],
+        )
+        with pytest.raises(ValueError, match="Unsafe SQL data type"):
+            SchemaManager._create_table_statements(self._mgr(), table)
 
     def test_unsafe_table_name_raises(self):
         table = Table(
@@ -301,6 +315,20 @@ class TestAlterTableStatements:
         fk_stmts = [s for s in stmts if "ADD CONSTRAINT" in s]
         assert len(fk_stmts) == 0
 
+    def test_equivalent_fk_spelling_not_re_added(self):
+        current = Table(
+            name="t",
+            columns=[Column(name="id", data_type="SERIAL", is_nullable=False, is_primary_key=True)],
+            foreign_keys=['FOREIGN KEY ("ref_id")  REFERENCES  other ( id )'],
+        )
+        new = Table(
+            name="t",
+            columns=[Column(name="id", data_type="SERIAL", is_nullable=False, is_primary_key=True)],
+            foreign_keys=["FOREIGN KEY (ref_id) REFERENCES other(id)"],
+        )
+        stmts = SchemaManager._alter_table_statements(self._mgr(), current, new)
+        assert [s for s in stmts if "ADD CONSTRAINT" in s] == []
+
     def test_serial_matches_information_schema_integer(self):
         current = Table(
             name="t",